@@ -0,0 +1,587 @@
+#!/usr/bin/env python
+import csv
+import datetime
+import gzip
+import io
+import json
+import platform
+import random
+import statistics
+import string
+import subprocess
+import tarfile
+import tempfile
+import time
+import zlib
+from itertools import accumulate
+from pathlib import Path
+from unittest import mock
+
+import click
+import tabulate
+import torch
+from click.testing import CliRunner
+from lxml import etree
+
+import manage
+
+NAMESPACE = "http://publications.europa.eu/resource/schema/ted/R2.0.9/publication"
+YEAR = 2022
+
+# Weights approximate the distribution of R2.0.9 notices in TED's 2022 monthly packages.
+FORMS = {
+    "F01": 3,
+    "F02": 42,
+    "F03": 34,
+    "F04": 1,
+    "F05": 2,
+    "F06": 2,
+    "F07": 1,
+    "F08": 1,
+    "F14": 9,
+    "F20": 2,
+    "F21": 2,
+    "F25": 1,
+}
+LANGUAGES = {
+    "DE": 24,
+    "FR": 19,
+    "PL": 11,
+    "ES": 7,
+    "IT": 6,
+    "EN": 5,
+    "CS": 4,
+    "NL": 4,
+    "SV": 4,
+    "RO": 3,
+    "FI": 2,
+    "DA": 2,
+    "HU": 2,
+    "LT": 1,
+    "LV": 1,
+    "PT": 1,
+    "SK": 1,
+    "SL": 1,
+    "HR": 1,
+    "BG": 1,
+    "EL": 1,
+    "ET": 1,
+}
+# Main CPV codes, including some in divisions that xml2csv skips.
+CPVS = {
+    "45000000": 14,
+    "45233140": 6,
+    "45453000": 5,
+    "71000000": 6,
+    "72000000": 4,
+    "79000000": 5,
+    "33100000": 6,
+    "33600000": 5,
+    "09134100": 2,
+    "34100000": 4,
+    "34144900": 2,
+    "30200000": 3,
+    "30192000": 2,
+    "39100000": 3,
+    "39130000": 2,
+    "39150000": 1,
+    "18100000": 2,
+    "39500000": 1,
+    "98311000": 1,
+    "50000000": 4,
+    "55300000": 2,
+    "60100000": 2,
+    "90910000": 3,
+    "90911200": 2,
+    "90919200": 1,
+    "15000000": 3,
+    "03000000": 1,
+    "42000000": 2,
+    "48000000": 2,
+}
+# Number of lots (OBJECT_DESCR elements) per notice.
+LOTS = {1: 72, 2: 9, 3: 5, 4: 3, 5: 2, 6: 2, 8: 2, 10: 2, 15: 1, 25: 1, 50: 1}
+# Probability that each LEFTI element is set.
+LEFTI = {
+    "SUITABILITY": 0.6,
+    "ECONOMIC_FINANCIAL_INFO": 0.45,
+    "ECONOMIC_FINANCIAL_MIN_LEVEL": 0.25,
+    "TECHNICAL_PROFESSIONAL_INFO": 0.5,
+    "TECHNICAL_PROFESSIONAL_MIN_LEVEL": 0.3,
+    "PERFORMANCE_CONDITIONS": 0.35,
+}
+# As skipped by xml2csv.
+SKIPPED_FORMS = {"F03", "F06", "F14", "F20"}
+SKIPPED_DIVISIONS = {"09", "24", "33", "35", "38", "66", "71", "72", "77", "80", "85"}
+
+# Arguments for the benchmarked commands, formatted with the working directory and options.
+BENCHMARKS = {
+    "xml2csv": ["xml2csv", str(YEAR), "1", str(YEAR), "{months}", "{workdir}/xml2csv.csv"],
+    "xml2corpus": [
+        "xml2corpus",
+        str(YEAR),
+        "1",
+        str(YEAR),
+        "{months}",
+        "{workdir}/xml2corpus.txt",
+        "391",
+        "45",
+        "909",
+    ],
+    "csv2corpus": ["csv2corpus", "{workdir}/rows.csv", "{workdir}/csv2corpus.txt", "391", "45", "909"],
+    "csv2corpus-provenance": [
+        "csv2corpus",
+        "{workdir}/rows.csv",
+        "{workdir}/csv2corpus-provenance.txt",
+        "391",
+        "45",
+        "909",
+        "--provenance",
+    ],
+    "search": ["search", "{workdir}/corpus.txt", "{workdir}/queries.txt", "0.5"],
+}
+
+
+def weighted(rng, weights):
+    return rng.choices(list(weights), weights=weights.values())[0]
+
+
+class Vocabulary:
+    """Produce sentences that repeat with a long-tailed frequency, like boilerplate in procurement notices."""
+
+    def __init__(self, rng, size=2000):
+        self.rng = rng
+        words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 12))) for _ in range(size * 2)]
+        self.words = words
+        self.pool = [self.fresh() for _ in range(size)]
+        # Zipf's law.
+        self.cum_weights = list(accumulate(1 / rank for rank in range(1, size + 1)))
+
+    def fresh(self):
+        words = self.rng.choices(self.words, k=self.rng.randint(4, 24))
+        return f"{' '.join(words).capitalize()}."
+
+    def sentence(self):
+        if self.rng.random() < 0.3:
+            return self.fresh()
+        return self.rng.choices(self.pool, cum_weights=self.cum_weights)[0]
+
+    def paragraph(self):
+        return " ".join(self.sentence() for _ in range(self.rng.randint(1, 4)))
+
+    def paragraphs(self):
+        return [self.paragraph() for _ in range(self.rng.choices((1, 2, 3, 5), weights=(60, 25, 10, 5))[0])]
+
+
+def notice_generator(rng, vocabulary, year, month, count):
+    """Yield synthetic notices, as dicts whose keys are the same as xml2csv's columns."""
+    for number in range(count):
+        language = weighted(rng, LANGUAGES)
+        notice = {
+            "NUMBER": f"{(month - 1) * count + number + 1:06d}-{year}",
+            "DAY": rng.randint(1, 28),
+            "MONTH": f"{year}-{month:02d}",
+            "FORM": weighted(rng, FORMS),
+            "LG": language,
+            "CPV_MAIN": weighted(rng, CPVS),
+            "LOTS": [],
+        }
+        notice["URI_DOC"] = f"https://ted.europa.eu/udl?uri=TED:NOTICE:{notice['NUMBER']}:TEXT:{language}:HTML"
+        if rng.random() < 0.7:
+            notice["URL_DOCUMENT"] = [f"https://tenders.example.com/{notice['NUMBER']}"]
+        if rng.random() < 0.9:
+            notice["LEFTI"] = True
+            notice["ECONOMIC_CRITERIA_DOC"] = rng.random() < 0.3
+            notice["TECHNICAL_CRITERIA_DOC"] = rng.random() < 0.3
+            for element, probability in LEFTI.items():
+                if rng.random() < probability:
+                    notice[element] = vocabulary.paragraphs()
+
+        for _ in range(weighted(rng, LOTS)):
+            lot = {
+                "CPV_ADDITIONAL": rng.sample(list(CPVS), k=rng.choices((0, 1, 2, 4), weights=(50, 30, 15, 5))[0]),
+            }
+            criteria = rng.random()
+            if criteria < 0.1:
+                lot["AC_PROCUREMENT_DOC"] = True
+            elif criteria < 0.4:
+                lot["AC_PRICE"] = True
+            else:
+                lot["AC_QUALITY"] = [vocabulary.sentence() for _ in range(rng.randint(1, 4))]
+                if rng.random() < 0.8:
+                    lot["AC_PRICE"] = True
+                else:
+                    lot["AC_COST"] = [vocabulary.sentence() for _ in range(rng.randint(1, 2))]
+            if rng.random() < 0.1:
+                lot["CRITERIA_CANDIDATE"] = vocabulary.paragraphs()
+            notice["LOTS"].append(lot)
+
+        yield notice
+
+
+def notice_xml(rng, notice):
+    """Return a notice as an R2.0.9 XML document, or as an eForms or R2.0.8 document that xml2csv skips."""
+    kind = rng.random()
+    if kind < 0.02:
+        return (
+            b'<ContractNotice xmlns="urn:oasis:names:specification:ubl:schema:xsd:ContractNotice-2" '
+            b'xmlns:efext="http://data.europa.eu/p27/eforms-ubl-extensions/1"/>'
+        )
+    if kind < 0.03:
+        return b'<TED_EXPORT xmlns="http://publications.europa.eu/resource/schema/ted/R2.0.8/publication"/>'
+
+    def sub(parent, tag, text=None, **attributes):
+        element = etree.SubElement(parent, f"{{{NAMESPACE}}}{tag}", attributes)
+        element.text = text
+        return element
+
+    def paragraphs(parent, tag, values):
+        element = sub(parent, tag)
+        for value in values:
+            sub(element, "P", value)
+
+    def cpv(parent, tag, code):
+        sub(sub(parent, tag), "CPV_CODE", CODE=code)
+
+    root = etree.Element(f"{{{NAMESPACE}}}TED_EXPORT", nsmap={None: NAMESPACE})
+    uris = sub(sub(sub(root, "CODED_DATA_SECTION"), "NOTICE_DATA"), "URI_LIST")
+    for language in dict.fromkeys((notice["LG"], "EN")):
+        sub(uris, "URI_DOC", notice["URI_DOC"].replace(f":{notice['LG']}:", f":{language}:"), LG=language)
+
+    form = sub(sub(root, "FORM_SECTION"), f"{notice['FORM']}_2014", CATEGORY="ORIGINAL", FORM=notice["FORM"])
+    form.set("LG", notice["LG"])
+    body = sub(form, "CONTRACTING_BODY")
+    sub(body, "ADDRESS_CONTRACTING_BODY")
+    for url in notice.get("URL_DOCUMENT", []):
+        sub(body, "URL_DOCUMENT", url)
+
+    obj = sub(form, "OBJECT_CONTRACT")
+    sub(obj, "TITLE", notice["NUMBER"])
+    cpv(obj, "CPV_MAIN", notice["CPV_MAIN"])
+
+    for number, lot in enumerate(notice["LOTS"], 1):
+        descr = sub(obj, "OBJECT_DESCR", ITEM=str(number))
+        for code in lot["CPV_ADDITIONAL"]:
+            cpv(descr, "CPV_ADDITIONAL", code)
+        ac = sub(descr, "AC")
+        if lot.get("AC_PROCUREMENT_DOC"):
+            sub(ac, "AC_PROCUREMENT_DOC")
+        for element in ("AC_QUALITY", "AC_COST"):
+            for criterion in lot.get(element, []):
+                parent = sub(ac, element)
+                sub(parent, "AC_CRITERION", criterion)
+                sub(parent, "AC_WEIGHTING", str(rng.randint(1, 50)))
+        if lot.get("AC_PRICE"):
+            sub(sub(ac, "AC_PRICE"), "AC_WEIGHTING", str(rng.randint(50, 100)))
+        if "CRITERIA_CANDIDATE" in lot:
+            paragraphs(descr, "CRITERIA_CANDIDATE", lot["CRITERIA_CANDIDATE"])
+
+    if notice.get("LEFTI"):
+        lefti = sub(form, "LEFTI")
+        for element in LEFTI:
+            if element in notice:
+                paragraphs(lefti, element, notice[element])
+            if element == "ECONOMIC_FINANCIAL_INFO" and notice["ECONOMIC_CRITERIA_DOC"]:
+                sub(lefti, "ECONOMIC_CRITERIA_DOC")
+            if element == "TECHNICAL_PROFESSIONAL_INFO" and notice["TECHNICAL_CRITERIA_DOC"]:
+                sub(lefti, "TECHNICAL_CRITERIA_DOC")
+
+    return etree.tostring(root, xml_declaration=True, encoding="UTF-8")
+
+
+def notice_rows(notice):
+    """Yield the rows that xml2csv writes for a notice."""
+    if notice["FORM"] in SKIPPED_FORMS or notice["CPV_MAIN"][:2] in SKIPPED_DIVISIONS:
+        return
+
+    code = notice["CPV_MAIN"]
+    common = {f"CPV{length}": code[:length] for length in range(2, 6)}
+    common.update(
+        {
+            "CPV_MAIN": code,
+            "MONTH": notice["MONTH"],
+            "FORM": notice["FORM"],
+            "LG": notice["LG"],
+            "URI_DOC": notice["URI_DOC"],
+            "URL_DOCUMENT_ANY": "URL_DOCUMENT" in notice,
+        }
+    )
+    if "URL_DOCUMENT" in notice:
+        common["URL_DOCUMENT"] = notice["URL_DOCUMENT"]
+    if notice.get("LEFTI"):
+        common["ECONOMIC_CRITERIA_DOC"] = notice["ECONOMIC_CRITERIA_DOC"]
+        common["TECHNICAL_CRITERIA_DOC"] = notice["TECHNICAL_CRITERIA_DOC"]
+        for element in LEFTI:
+            common[f"{element}_ANY"] = element in notice
+            if element in notice:
+                common[element] = notice[element]
+
+    for lot in notice["LOTS"]:
+        row = common.copy()
+        row["CPV_ADDITIONAL"] = ";".join(c for c in lot["CPV_ADDITIONAL"] if c != code)
+        row["AC_PROCUREMENT_DOC"] = lot.get("AC_PROCUREMENT_DOC", False)
+        row["AC_PRICE"] = lot.get("AC_PRICE", False)
+        for element in ("AC_QUALITY", "AC_COST", "CRITERIA_CANDIDATE"):
+            row[f"{element}_ANY"] = element in lot
+            if element in lot:
+                row[element] = lot[element]
+        yield row
+
+
+def write_ted(outdir, months, notices, seed):
+    rng = random.Random(seed)  # noqa: S311 # not cryptographic
+    vocabulary = Vocabulary(rng)
+    outdir.mkdir(parents=True, exist_ok=True)
+
+    for month in range(1, months + 1):
+        path = outdir / f"{YEAR}-{month:02d}.tar.gz"
+        # Set mtime, for reproducible output.
+        with (
+            path.open("wb") as f,
+            gzip.GzipFile(fileobj=f, mode="wb", mtime=0) as g,
+            tarfile.open(fileobj=g, mode="w") as tar,
+        ):
+            for notice in notice_generator(rng, vocabulary, YEAR, month, notices):
+                data = notice_xml(rng, notice)
+                number, year = notice["NUMBER"].split("-")
+                info = tarfile.TarInfo(f"{year}{month:02d}{notice['DAY']:02d}_001/{number}_{year}.xml")
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+
+
+def write_csv(path, rows, seed):
+    rng = random.Random(seed)  # noqa: S311 # not cryptographic
+    vocabulary = Vocabulary(rng)
+    written = 0
+
+    with path.open("w") as f:
+        writer = csv.DictWriter(f, manage.FIELDNAMES)
+        writer.writeheader()
+        month = 1
+        while written < rows:
+            for notice in notice_generator(rng, vocabulary, YEAR, month, 1000):
+                for row in notice_rows(notice):
+                    writer.writerow(row)
+                    written += 1
+                    if written == rows:
+                        return
+            month = month % 12 + 1
+
+
+def write_corpus(path, sentences, seed):
+    rng = random.Random(seed)  # noqa: S311 # not cryptographic
+    vocabulary = Vocabulary(rng, size=max(sentences // 2, 1))
+    # A dict, not a set, to write sentences in insertion order, regardless of PYTHONHASHSEED.
+    unique = {}
+    while len(unique) < sentences:
+        unique[vocabulary.sentence()] = None
+
+    with path.open("w") as f:
+        f.writelines(f"{sentence}\n" for sentence in unique)
+
+
+def write_queries(corpus, path, queries, seed):
+    # Perturb sentences from the corpus, so that some queries match.
+    rng = random.Random(seed)  # noqa: S311 # not cryptographic
+    with corpus.open() as f:
+        sentences = f.read().splitlines()
+
+    with path.open("w") as f:
+        for sentence in rng.sample(sentences, min(queries, len(sentences))):
+            words = sentence.split()
+            del words[rng.randrange(len(words))]
+            f.write(f"{' '.join(words)}\n")
+
+
+class StubEncoder:
+    """Replace SentenceTransformer with a deterministic bag-of-words encoder, to run without the model."""
+
+    dimensions = 384
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def encode(self, sentences, *, convert_to_tensor=False, normalize_embeddings=False):
+        rows = []
+        columns = []
+        for i, sentence in enumerate(sentences):
+            for token in sentence.lower().split():
+                rows.append(i)
+                columns.append(zlib.crc32(token.encode()) % self.dimensions)
+
+        embeddings = torch.zeros(len(sentences), self.dimensions)
+        embeddings.index_put_(
+            (torch.tensor(rows, dtype=torch.long), torch.tensor(columns, dtype=torch.long)),
+            torch.ones(len(rows)),
+            accumulate=True,
+        )
+        if normalize_embeddings:
+            embeddings = torch.nn.functional.normalize(embeddings, dim=1)
+        if convert_to_tensor:
+            return embeddings
+        return embeddings.numpy()
+
+
+def commit():
+    return subprocess.check_output(  # noqa: S603 # trusted input
+        ["git", "describe", "--always", "--dirty"],  # noqa: S607
+        cwd=manage.basedir,
+        text=True,
+    ).strip()
+
+
+@click.group()
+def cli():
+    pass
+
+
+@cli.command()
+@click.argument("outdir", type=click.Path(file_okay=False, path_type=Path))
+@click.option("--months", type=click.IntRange(1, 12), default=1, show_default=True)
+@click.option("--notices", type=click.IntRange(1), default=1000, show_default=True, help="Notices per month")
+@click.option("--seed", type=int, default=0, show_default=True)
+def generate_ted(outdir, months, notices, seed):
+    """Write synthetic monthly packages from Tenders Electronic Daily to a directory."""
+    with manage.timed(f"Writing {months} packages of {notices:,d} notices"):
+        write_ted(outdir, months, notices, seed)
+
+
+@cli.command()
+@click.argument("file", type=click.Path(dir_okay=False, path_type=Path))
+@click.option("--rows", type=click.IntRange(1), default=10000, show_default=True)
+@click.option("--seed", type=int, default=0, show_default=True)
+def generate_csv(file, rows, seed):
+    """Write a synthetic CSV file, like the output of xml2csv."""
+    with manage.timed(f"Writing {rows:,d} rows"):
+        write_csv(file, rows, seed)
+
+
+@cli.command()
+@click.argument("file", type=click.Path(dir_okay=False, path_type=Path))
+@click.option("--sentences", type=click.IntRange(1), default=10000, show_default=True)
+@click.option("--seed", type=int, default=0, show_default=True)
+def generate_corpus(file, sentences, seed):
+    """Write a synthetic corpus or queries file, like the output of csv2corpus or pdf2queries."""
+    with manage.timed(f"Writing {sentences:,d} sentences"):
+        write_corpus(file, sentences, seed)
+
+
+@cli.command()
+@click.argument("benchmarks", nargs=-1, type=click.Choice(list(BENCHMARKS)))
+@click.option("--months", type=click.IntRange(1, 12), default=1, show_default=True)
+@click.option("--notices", type=click.IntRange(1), default=1000, show_default=True, help="Notices per month")
+@click.option("--rows", type=click.IntRange(1), default=10000, show_default=True)
+@click.option("--sentences", type=click.IntRange(1), default=10000, show_default=True)
+@click.option("--queries", type=click.IntRange(1), default=100, show_default=True)
+@click.option("--seed", type=int, default=0, show_default=True)
+@click.option("--repeat", type=click.IntRange(1), default=3, show_default=True)
+@click.option(
+    "--results",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=manage.basedir / "benchmark.jsonl",
+    show_default=True,
+)
+def run(benchmarks, months, notices, rows, sentences, queries, seed, repeat, results):
+    """Time commands against synthetic data, and append the timings to a JSON Lines file."""
+    options = {
+        "months": months,
+        "notices": notices,
+        "rows": rows,
+        "sentences": sentences,
+        "queries": queries,
+        "seed": seed,
+    }
+    benchmarks = benchmarks or list(BENCHMARKS)
+    revision = commit()
+    runner = CliRunner()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        workdir = Path(tmpdir)
+
+        if "xml2csv" in benchmarks or "xml2corpus" in benchmarks:
+            with manage.timed("Generating TED packages"):
+                write_ted(workdir / "data", months, notices, seed)
+        if "csv2corpus" in benchmarks or "csv2corpus-provenance" in benchmarks:
+            with manage.timed("Generating CSV"):
+                write_csv(workdir / "rows.csv", rows, seed)
+        if "search" in benchmarks:
+            with manage.timed("Generating corpus and queries"):
+                write_corpus(workdir / "corpus.txt", sentences, seed)
+                write_queries(workdir / "corpus.txt", workdir / "queries.txt", queries, seed)
+
+        manage.download_punkt()
+
+        with (
+            mock.patch.object(manage, "datadir", workdir / "data"),
+            mock.patch.object(manage, "SentenceTransformer", StubEncoder),
+        ):
+            for name in benchmarks:
+                args = [arg.format(workdir=workdir, **options) for arg in BENCHMARKS[name]]
+                timings = []
+                for _ in range(repeat):
+                    # Measure the encoding, not the cache.
+                    for cache in workdir.glob("*.pickle"):
+                        cache.unlink()
+
+                    start = time.perf_counter()
+                    result = runner.invoke(manage.cli, args, catch_exceptions=False)
+                    timings.append(time.perf_counter() - start)
+                    if result.exit_code:
+                        raise click.ClickException(f"{name} failed:\n{result.output}")
+
+                record = {
+                    "commit": revision,
+                    "date": datetime.datetime.now(tz=datetime.UTC).isoformat(timespec="seconds"),
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "benchmark": name,
+                    "options": options,
+                    "timings": timings,
+                    "min": min(timings),
+                    "median": statistics.median(timings),
+                }
+                with results.open("a") as f:
+                    f.write(f"{json.dumps(record)}\n")
+
+                click.echo(f"{name}: {record['min']:.3f}s min, {record['median']:.3f}s median ({repeat} runs)")
+
+
+@cli.command()
+@click.argument("base")
+@click.argument("head")
+@click.option(
+    "--results",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    default=manage.basedir / "benchmark.jsonl",
+    show_default=True,
+)
+def compare(base, head, results):
+    """Compare the most recent timings of two commits, with the same options."""
+    latest = {}
+    with results.open() as f:
+        for line in f:
+            record = json.loads(line)
+            latest[(record["commit"], record["benchmark"], json.dumps(record["options"], sort_keys=True))] = record
+
+    table = []
+    for (revision, name, options), record in latest.items():
+        if revision != base or (other := latest.get((head, name, options))) is None:
+            continue
+        table.append(
+            [
+                name,
+                " ".join(f"{key}={value}" for key, value in json.loads(options).items()),
+                f"{record['median']:.3f}",
+                f"{other['median']:.3f}",
+                f"{other['median'] / record['median']:.2f}x",
+            ]
+        )
+
+    if not table:
+        raise click.UsageError(f"no benchmarks with the same options for both {base} and {head}")
+
+    click.echo(tabulate.tabulate(table, headers=["benchmark", "options", base, head, "ratio"]))
+
+
+if __name__ == "__main__":
+    cli()
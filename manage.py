@@ -11,6 +11,7 @@ import shutil
 import subprocess
 import tarfile
 import time
+from array import array
 from collections import defaultdict
 from contextlib import closing, contextmanager
 from operator import itemgetter
@@ -20,6 +21,7 @@ from urllib.request import urlopen
 
 import click
 import nltk
+import numpy as np
 import pdf2image
 import pypandoc
 import requests
@@ -30,9 +32,113 @@ from nltk import tokenize
 from pytesseract import pytesseract
 from sentence_transformers import SentenceTransformer, util
 
+import powerbi
+
 SENTENCE_MINLENGTH = 10
 WHITESPACE = re.compile(r"\s+")
 
+FIELDNAMES = [
+    "MONTH",
+    "FORM",
+    "LG",
+    "URI_DOC",
+    "URL_DOCUMENT_ANY",
+    "URL_DOCUMENT",
+    "CPV2",
+    "CPV3",
+    "CPV4",
+    "CPV5",
+    "CPV_MAIN",
+    "SUITABILITY_ANY",
+    "SUITABILITY",
+    "ECONOMIC_CRITERIA_DOC",
+    "ECONOMIC_FINANCIAL_INFO_ANY",
+    "ECONOMIC_FINANCIAL_INFO",
+    "ECONOMIC_FINANCIAL_MIN_LEVEL_ANY",
+    "ECONOMIC_FINANCIAL_MIN_LEVEL",
+    "TECHNICAL_CRITERIA_DOC",
+    "TECHNICAL_PROFESSIONAL_INFO_ANY",
+    "TECHNICAL_PROFESSIONAL_INFO",
+    "TECHNICAL_PROFESSIONAL_MIN_LEVEL_ANY",
+    "TECHNICAL_PROFESSIONAL_MIN_LEVEL",
+    "PERFORMANCE_CONDITIONS_ANY",
+    "PERFORMANCE_CONDITIONS",
+    "CPV_ADDITIONAL",
+    "AC_PROCUREMENT_DOC",
+    "AC_PRICE",
+    "AC_QUALITY_ANY",
+    "AC_QUALITY",
+    "AC_COST_ANY",
+    "AC_COST",
+    "CRITERIA_CANDIDATE_ANY",
+    "CRITERIA_CANDIDATE",
+]
+
+SENTENCE_COLUMNS = (
+    "SUITABILITY",
+    "ECONOMIC_FINANCIAL_INFO",
+    "ECONOMIC_FINANCIAL_MIN_LEVEL",
+    "TECHNICAL_PROFESSIONAL_INFO",
+    "TECHNICAL_PROFESSIONAL_MIN_LEVEL",
+    "PERFORMANCE_CONDITIONS",
+    "CRITERIA_CANDIDATE",
+    "AC_QUALITY",
+    "AC_COST",
+)
+# The other sentence columns are set per notice, and are repeated in the row of each lot.
+LOT_COLUMNS = ("CRITERIA_CANDIDATE", "AC_QUALITY", "AC_COST")
+
+LANGUAGES = {
+    # ls ~/nltk_data/tokenizers/punkt/*.pickle
+    # Also covers "malayalam", but conflicts with "ML" for "maltese".
+    # Germanic
+    "DA": "danish",
+    "NL": "dutch",
+    "EN": "english",
+    "DE": "german",
+    "NO": "norwegian",
+    "SV": "swedish",
+    # Hellenic
+    "EL": "greek",
+    # Italic
+    "FR": "french",
+    "IT": "italian",
+    "PT": "portuguese",
+    "ES": "spanish",
+    # Slavic
+    "CS": "czech",
+    "PL": "polish",
+    "RU": "russian",
+    "SL": "slovene",
+    # Uralic
+    "ET": "estonian",
+    "FI": "finnish",
+    # Turkic
+    "TR": "turkish",
+    # Languages not supported by NLTK.
+    # Baltic
+    "LV": "slovene",  # latvian
+    "LT": "slovene",  # lithuanian
+    # Celtic
+    "GA": "italian",  # irish
+    # Italic
+    "RO": "italian",  # romanian
+    # Semitic
+    "ML": "spanish",  # maltese, should be "MT"
+    # Slavic
+    "BG": "slovene",  # bulgarian
+    "HR": "slovene",  # croatian
+    "SK": "czech",  # slovak
+    # Uralic
+    "HU": "finnish",  # hungarian
+}
+
+# The occurrence of a sentence in a column of a notice. For LOT_COLUMNS, the lot is its position in the notice, from 1.
+# Otherwise, the lot is 0.
+PROVENANCE_DTYPE = np.dtype(
+    [("notice", "<u4"), ("lot", "<u2"), ("column", "u1"), ("language", "u1"), ("month", "<u2")]
+)
+
 now = datetime.datetime.now(tz=datetime.UTC)
 basedir = Path(__file__).resolve().parent
 datadir = basedir / "data"
@@ -62,9 +168,17 @@ def raise_if_pdftotext_not_present():
         raise click.UsageError("pdftotext command is not available. Install Poppler: https://poppler.freedesktop.org")
 
 
+def download_punkt():
+    # nltk.download() checks the remote index even if the package is installed, which fails offline.
+    try:
+        nltk.data.find("tokenizers/punkt_tab")
+    except LookupError:
+        nltk.download("punkt_tab")
+
+
 def sentence_generator(text, language):
     for sentence in tokenize.sent_tokenize(text, language=language):
-        stripped = WHITESPACE.sub(sentence, " ").strip()
+        stripped = WHITESPACE.sub(" ", sentence).strip()
         if len(stripped) > SENTENCE_MINLENGTH:
             yield stripped
 
@@ -101,57 +215,13 @@ def download_ted(startyear, startmonth, endyear, endmonth):
             click.echo(e.reason, err=True)
 
 
-@cli.command()
-@click.argument("startyear", type=click.IntRange(2015, now.year))
-@click.argument("startmonth", type=click.IntRange(1, 12))
-@click.argument("endyear", type=click.IntRange(2015, now.year))
-@click.argument("endmonth", type=click.IntRange(1, 12))
-@click.argument("file", type=click.File("w"))
-@click.argument("cpv", nargs=-1)
-def xml2csv(startyear, startmonth, endyear, endmonth, file, cpv):
-    """Transform monthly packages in the data/ directory to a CSV file."""
-    kw = {"namespaces": {"ns": "http://publications.europa.eu/resource/schema/ted/R2.0.9/publication"}}
+def matches_cpv(row, cpv):
+    return any(row[f"CPV{len(code)}"] == code if len(code) <= 5 else row["CPV_MAIN"] == code for code in cpv)
 
-    writer = csv.DictWriter(
-        file,
-        [
-            "MONTH",
-            "FORM",
-            "LG",
-            "URI_DOC",
-            "URL_DOCUMENT_ANY",
-            "URL_DOCUMENT",
-            "CPV2",
-            "CPV3",
-            "CPV4",
-            "CPV5",
-            "CPV_MAIN",
-            "SUITABILITY_ANY",
-            "SUITABILITY",
-            "ECONOMIC_CRITERIA_DOC",
-            "ECONOMIC_FINANCIAL_INFO_ANY",
-            "ECONOMIC_FINANCIAL_INFO",
-            "ECONOMIC_FINANCIAL_MIN_LEVEL_ANY",
-            "ECONOMIC_FINANCIAL_MIN_LEVEL",
-            "TECHNICAL_CRITERIA_DOC",
-            "TECHNICAL_PROFESSIONAL_INFO_ANY",
-            "TECHNICAL_PROFESSIONAL_INFO",
-            "TECHNICAL_PROFESSIONAL_MIN_LEVEL_ANY",
-            "TECHNICAL_PROFESSIONAL_MIN_LEVEL",
-            "PERFORMANCE_CONDITIONS_ANY",
-            "PERFORMANCE_CONDITIONS",
-            "CPV_ADDITIONAL",
-            "AC_PROCUREMENT_DOC",
-            "AC_PRICE",
-            "AC_QUALITY_ANY",
-            "AC_QUALITY",
-            "AC_COST_ANY",
-            "AC_COST",
-            "CRITERIA_CANDIDATE_ANY",
-            "CRITERIA_CANDIDATE",
-        ],
-    )
-    writer.writeheader()
+
+def ted_rows(startyear, startmonth, endyear, endmonth, cpv):
+    """Yield one row per lot of the notices in the monthly packages in the data/ directory."""
+    kw = {"namespaces": {"ns": "http://publications.europa.eu/resource/schema/ted/R2.0.9/publication"}}
 
     for year, month in yearmonths(startyear, startmonth, endyear, endmonth):
         path = datadir / f"{year}-{month:02d}.tar.gz"
@@ -204,9 +274,7 @@ def xml2csv(startyear, startmonth, endyear, endmonth, file, cpv):
                 common["CPV5"] = code[:5]
                 common["CPV_MAIN"] = code
 
-                if cpv and not any(
-                    common[f"CPV{len(code)}"] == code if len(code) <= 5 else common["CPV_MAIN"] == code for code in cpv
-                ):
+                if cpv and not matches_cpv(common, cpv):
                     continue
 
                 common["MONTH"] = f"{year}-{month:02d}"
@@ -274,100 +342,182 @@ def xml2csv(startyear, startmonth, endyear, endmonth, file, cpv):
                     if p:
                         row["CRITERIA_CANDIDATE"] = p
 
-                    writer.writerow(row)
+                    yield row
 
 
 @cli.command()
-@click.argument("infile", type=click.File())
-@click.argument("outfile", type=click.File("w"))
+@click.argument("startyear", type=click.IntRange(2015, now.year))
+@click.argument("startmonth", type=click.IntRange(1, 12))
+@click.argument("endyear", type=click.IntRange(2015, now.year))
+@click.argument("endmonth", type=click.IntRange(1, 12))
+@click.argument("file", type=click.File("w"))
 @click.argument("cpv", nargs=-1)
-def csv2corpus(infile, outfile, cpv):
-    """Extract sentences from the rows of a CSV file that match the CPV code(s), one line per sentence."""
-    languages = {
-        # ls ~/nltk_data/tokenizers/punkt/*.pickle
-        # Also covers "malayalam", but conflicts with "ML" for "maltese".
-        # Germanic
-        "DA": "danish",
-        "NL": "dutch",
-        "EN": "english",
-        "DE": "german",
-        "NO": "norwegian",
-        "SV": "swedish",
-        # Hellenic
-        "EL": "greek",
-        # Italic
-        "FR": "french",
-        "IT": "italian",
-        "PT": "portuguese",
-        "ES": "spanish",
-        # Slavic
-        "CS": "czech",
-        "PL": "polish",
-        "RU": "russian",
-        "SL": "slovene",
-        # Uralic
-        "ET": "estonian",
-        "FI": "finnish",
-        # Turkic
-        "TR": "turkish",
-        # Languages not supported by NLTK.
-        # Baltic
-        "LV": "slovene",  # latvian
-        "LT": "slovene",  # lithuanian
-        # Celtic
-        "GA": "italian",  # irish
-        # Italic
-        "RO": "italian",  # romanian
-        # Semitic
-        "ML": "spanish",  # maltese, should be "MT"
-        # Slavic
-        "BG": "slovene",  # bulgarian
-        "HR": "slovene",  # croatian
-        "SK": "czech",  # slovak
-        # Uralic
-        "HU": "finnish",  # hungarian
-    }
-
-    nltk.download("punkt")
-
-    columns = {
-        "SUITABILITY": 0,
-        "ECONOMIC_FINANCIAL_INFO": 0,
-        "ECONOMIC_FINANCIAL_MIN_LEVEL": 0,
-        "TECHNICAL_PROFESSIONAL_INFO": 0,
-        "TECHNICAL_PROFESSIONAL_MIN_LEVEL": 0,
-        "PERFORMANCE_CONDITIONS": 0,
-        "CRITERIA_CANDIDATE": 0,
-        "AC_QUALITY": 0,
-        "AC_COST": 0,
-    }
-
-    reader = csv.DictReader(infile)
-    sentences = set()
+def xml2csv(startyear, startmonth, endyear, endmonth, file, cpv):
+    """Transform monthly packages in the data/ directory to a CSV file."""
+    writer = csv.DictWriter(file, FIELDNAMES)
+    writer.writeheader()
+    writer.writerows(ted_rows(startyear, startmonth, endyear, endmonth, cpv))
+
+
+class ProvenanceWriter:
+    """Collect the occurrences of sentences in notices, and write them as a provenance index."""
+
+    def __init__(self):
+        self.sentences = array("I")
+        self.fields = {name: array(typecode) for name, typecode in zip(PROVENANCE_DTYPE.names, "IHBBH", strict=True)}
+        # Intern strings, to store integers in the arrays.
+        self.tables = {name: {} for name in PROVENANCE_DTYPE.names if name != "lot"}
+
+    def add(self, sentence_id, row, lot, column):
+        self.sentences.append(sentence_id)
+        for name, value in (
+            ("notice", row["URI_DOC"]),
+            ("column", column),
+            ("language", row["LG"]),
+            ("month", row["MONTH"]),
+        ):
+            table = self.tables[name]
+            self.fields[name].append(table.setdefault(value, len(table)))
+        self.fields["lot"].append(lot)
+
+    def write(self, directory, sentence_count, corpus):
+        """Write the provenance index for ``sentence_count`` sentences, with the ``os.stat`` result of the corpus."""
+        directory.mkdir(exist_ok=True)
+
+        # Sort the occurrences by sentence, and store the offset of each sentence's first occurrence.
+        sentences = np.frombuffer(self.sentences, dtype=np.uint32)
+        order = np.argsort(sentences, kind="stable")
+        offsets = np.zeros(sentence_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sentences, minlength=sentence_count), out=offsets[1:])
+
+        occurrences = np.empty(len(order), dtype=PROVENANCE_DTYPE)
+        for name in PROVENANCE_DTYPE.names:
+            occurrences[name] = np.frombuffer(self.fields[name], dtype=PROVENANCE_DTYPE[name])[order]
+
+        # Concatenate the notice URLs, to avoid reading them all to look up one.
+        notices = [uri.encode() for uri in self.tables["notice"]]
+        notice_offsets = np.zeros(len(notices) + 1, dtype=np.int64)
+        np.cumsum([len(notice) for notice in notices], out=notice_offsets[1:])
+
+        np.save(directory / "offsets.npy", offsets)
+        np.save(directory / "occurrences.npy", occurrences)
+        np.save(directory / "notice_offsets.npy", notice_offsets)
+        np.save(directory / "notices.npy", np.frombuffer(b"".join(notices), dtype=np.uint8))
+        with (directory / "tables.json").open("w") as f:
+            tables = {name: list(self.tables[name]) for name in ("column", "language", "month")}
+            # Like the search command's cache, to detect whether the corpus changed.
+            tables["corpus"] = {"size": corpus.st_size, "mtime": corpus.st_mtime_ns}
+            json.dump(tables, f)
+
+
+class ProvenanceIndex:
+    """Look up the occurrences of sentences in notices, from a provenance index written by ProvenanceWriter."""
+
+    def __init__(self, directory):
+        self.offsets = np.load(directory / "offsets.npy", mmap_mode="r")
+        self.occurrences = np.load(directory / "occurrences.npy", mmap_mode="r")
+        self.notice_offsets = np.load(directory / "notice_offsets.npy", mmap_mode="r")
+        self.notices = np.load(directory / "notices.npy", mmap_mode="r")
+        with (directory / "tables.json").open() as f:
+            self.tables = json.load(f)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def matches(self, path):
+        """Return whether the provenance index was written with the corpus file at this path, as it is now."""
+        stat = path.stat()
+        return self.tables.get("corpus") == {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+
+    def count(self, sentence_id):
+        return int(self.offsets[sentence_id + 1] - self.offsets[sentence_id])
+
+    def get(self, sentence_id, limit=None):
+        """Yield the occurrences of a sentence, as dicts."""
+        start = self.offsets[sentence_id]
+        end = self.offsets[sentence_id + 1]
+        if limit is not None:
+            end = min(end, start + limit)
+
+        for occurrence in self.occurrences[start:end]:
+            notice = occurrence["notice"]
+            yield {
+                "URI_DOC": self.notices[self.notice_offsets[notice] : self.notice_offsets[notice + 1]]
+                .tobytes()
+                .decode(),
+                "LOT": int(occurrence["lot"]),
+                "COLUMN": self.tables["column"][occurrence["column"]],
+                "LG": self.tables["language"][occurrence["language"]],
+                "MONTH": self.tables["month"][occurrence["month"]],
+            }
+
+
+def extract_corpus(rows, outfile, cpv, *, parse=None, provenance=False):
+    """
+    Write the unique sentences from the rows that match the CPV code(s), one line per sentence.
+
+    If ``parse`` is set, it is called on the values of the columns from which sentences are extracted.
+
+    If ``provenance`` is set, a provenance index is written to an OUTFILE.provenance directory. Otherwise, any
+    such directory is removed, as it would no longer match the output file.
+    """
+    directory = Path(f"{outfile.name}.provenance")
+    if outfile.name == "<stdout>":
+        if provenance:
+            raise click.UsageError("--provenance requires OUTFILE to be a file, not -")
+    elif not provenance and directory.is_dir():
+        shutil.rmtree(directory)
+
+    columns = dict.fromkeys(SENTENCE_COLUMNS, 0)
+    # The ID of a sentence is its line number in the output file, starting from 0.
+    sentences = {}
+    writer = ProvenanceWriter() if provenance else None
     matching = 0
     rowcount = 0
+    uri = None
 
     with timed("Extracting"):
-        for row in reader:
-            if not any(row[f"CPV{len(code)}"] == code if len(code) <= 5 else row["CPV_MAIN"] == code for code in cpv):
+        for row in rows:
+            # Lots are consecutive rows with the same notice URL.
+            if row["URI_DOC"] != uri:
+                uri = row["URI_DOC"]
+                lot = 0
+            lot += 1
+
+            if not matches_cpv(row, cpv):
                 continue
             matching += 1
 
-            if not any(row[f"{column}_ANY"] == "True" for column in columns):
+            if not any(row.get(column) for column in columns):
                 continue
             rowcount += 1
 
-            language = languages[row["LG"]]
+            language = LANGUAGES[row["LG"]]
+            # A sentence that repeats in a column of a row occurs in one place.
+            recorded = set()
 
             for column in columns:
-                if row[column]:
-                    for text in ast.literal_eval(row[column]):
+                if value := row.get(column):
+                    for text in parse(value) if parse else value:
                         for sentence in sentence_generator(text, language):
-                            sentences.add(sentence)
+                            sentence_id = sentences.get(sentence)
+                            if sentence_id is None:
+                                sentence_id = sentences[sentence] = len(sentences)
+                                outfile.write(f"{sentence}\n")
+                            # Record notice-level columns once per notice, not once per lot.
+                            if (
+                                writer
+                                and (column in LOT_COLUMNS or lot == 1)
+                                and (sentence_id, column) not in recorded
+                            ):
+                                recorded.add((sentence_id, column))
+                                writer.add(sentence_id, row, lot if column in LOT_COLUMNS else 0, column)
                             columns[column] += 1
 
-    for sentence in sentences:
-        outfile.write(f"{sentence}\n")
+    if writer:
+        outfile.flush()
+        with timed(f"Writing provenance index to {directory}"):
+            writer.write(directory, len(sentences), os.fstat(outfile.fileno()))
 
     click.echo(
         f"{len(sentences):,d} unique sentences ({sum(columns.values()):,d} total sentences) "
@@ -377,12 +527,55 @@ def csv2corpus(infile, outfile, cpv):
     click.echo(tabulate.tabulate(columns.items()))
 
 
+@cli.command()
+@click.argument("infile", type=click.File())
+@click.argument("outfile", type=click.File("w"))
+@click.argument("cpv", nargs=-1)
+@click.option("--provenance", is_flag=True, help="Write a provenance index to a OUTFILE.provenance directory.")
+def csv2corpus(infile, outfile, cpv, provenance):
+    """Extract sentences from the rows of a CSV file that match the CPV code(s), one line per sentence."""
+    download_punkt()
+
+    extract_corpus(
+        csv.DictReader(infile),
+        outfile,
+        cpv,
+        parse=ast.literal_eval,
+        provenance=provenance,
+    )
+
+
+@cli.command()
+@click.argument("startyear", type=click.IntRange(2015, now.year))
+@click.argument("startmonth", type=click.IntRange(1, 12))
+@click.argument("endyear", type=click.IntRange(2015, now.year))
+@click.argument("endmonth", type=click.IntRange(1, 12))
+@click.argument("outfile", type=click.File("w"))
+@click.argument("cpv", nargs=-1, required=True)
+@click.option("--provenance", is_flag=True, help="Write a provenance index to a OUTFILE.provenance directory.")
+def xml2corpus(startyear, startmonth, endyear, endmonth, outfile, cpv, provenance):
+    """Extract sentences from monthly packages in the data/ directory that match the CPV code(s), skipping xml2csv."""
+    download_punkt()
+
+    extract_corpus(
+        ted_rows(startyear, startmonth, endyear, endmonth, cpv),
+        outfile,
+        cpv,
+        provenance=provenance,
+    )
+
+
 @cli.command()
 @click.argument("corpusfile", type=click.File())
 @click.argument("queriesfile", type=click.File())
 @click.argument("minscore", type=float)
-def search(corpusfile, queriesfile, minscore):
-    """Calculate which sentences match the queries."""
+@click.option("--sources", type=click.IntRange(0), default=3, show_default=True, help="Notices to report per match")
+def search(corpusfile, queriesfile, minscore, sources):
+    """
+    Calculate which sentences match the queries.
+
+    If the corpus has a provenance index, report the notices in which the matching sentences occur.
+    """
 
     @functools.cache
     def model():
@@ -390,7 +583,7 @@ def search(corpusfile, queriesfile, minscore):
         return SentenceTransformer("sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
 
     def cached(file):
-        mtime = file.stat().st_mtime
+        mtime = Path(file.name).stat().st_mtime
 
         cache = Path(f"{file.name}.pickle")
         if cache.exists():
@@ -411,6 +604,14 @@ def search(corpusfile, queriesfile, minscore):
     queries, query_embeddings = cached(queriesfile)
     corpus, corpus_embeddings = cached(corpusfile)
 
+    index = None
+    provenance = Path(f"{corpusfile.name}.provenance")
+    if provenance.exists():
+        index = ProvenanceIndex(provenance)
+        if not index.matches(Path(corpusfile.name)) or len(index) != len(corpus):
+            click.secho(f"{provenance} doesn't match {corpusfile.name}, ignoring...", fg="yellow", err=True)
+            index = None
+
     with timed("Searching"):
         responses = util.semantic_search(
             query_embeddings,
@@ -432,6 +633,12 @@ def search(corpusfile, queriesfile, minscore):
             for hit in response:
                 if hit["score"] >= minscore:
                     click.echo(f"{hit['score']:.4f} {WHITESPACE.sub(' ', remove.sub('', corpus[hit['corpus_id']]))}")
+                    if index is not None:
+                        count = index.count(hit["corpus_id"])
+                        for o in index.get(hit["corpus_id"], limit=sources):
+                            lot = f"lot {o['LOT']} " if o["LOT"] else ""
+                            click.echo(f"       {o['URI_DOC']} {lot}{o['COLUMN']} {o['LG']} {o['MONTH']}")
+                        click.echo(f"       {count:,d} {'occurrence' if count == 1 else 'occurrences'}")
     click.echo(f"\n{matches}/{len(queries)} queries match with a score >= {minscore}")
 
 
@@ -466,80 +673,32 @@ def pdf2queries(infile, outfile, firstpage, lastpage):
 
 @cli.command()
 @click.argument("outdir", type=click.Path(exists=False, file_okay=False, path_type=Path))
-def download_do(outdir):
+@click.option(
+    "--max-age",
+    type=click.IntRange(0),
+    default=86400,
+    show_default=True,
+    help="Seconds for which to reuse cached Power BI responses",
+)
+def download_do(outdir, max_age):
     """Write "Especificaciones/Ficha Técnica" files from comprasverdes.gob.do."""
+    # This request data is copied from the web browser.
     with (basedir / "assets" / "do_post.json").open() as f:
         post_data = json.load(f)
 
-    response = requests.post(
-        "https://wabi-us-east-a-primary-api.analysis.windows.net/public/reports/querydata?synchronous=true",
-        # This request data is copied from the web browser.
-        json=post_data,
+    client = powerbi.Client(
         # The other headers from the web browser are not required.
-        headers={"X-PowerBI-ResourceKey": "6d07fc9a-46df-4b72-9509-ea5c80c85178"},
-        timeout=10,
+        resource_key="6d07fc9a-46df-4b72-9509-ea5c80c85178",
+        cache_dir=datadir / "powerbi",
+        max_age=max_age,
     )
-    response.raise_for_status()
-
-    """
-    Responses look like:
-
-    {
-        "jobIds": ["UUID"],
-        "results": [
-            {
-                "jobId": "UUID",
-                "result": {
-                    "data": {
-                        "timestamp": "2023-10-10T18:22:39.397Z",
-                        "rootActivityId": "UUID",
-                        "descriptor": {...},
-                        "metrics": {...}, // start times, end times, row counts for operations
-                        "fromCache": false,
-                        "dsr": {
-                            "Version": 2,
-                            "MinorVersion": 1,
-                            "DS": [
-                                {
-                                    "N": "DS0",
-                                    "PH": [
-                                        {
-                                            "DM0": [
-                                                {
-                                                    "S": [...],
-                                                    "C": [...]
-                                                },
-                                                {
-                                                    "C": [
-                                                        // a row of values
-                                                    ],
-                                                    "R": 123
-                                                },
-                                                ...
-                                            ]
-                                        }
-                                    ],
-                                    "IC": true,
-                                    "HAD": true,
-                                    "ValueDicts": {
-                                        "D0": [
-                                            "...",
-                                            ...
-                                        ],
-                                        ...
-                                    }
-                                }
-                            ]
-                        }
-                    }
-                }
-            }
-        ]
-    }
-    """
-    urls = set(response.json()["results"][0]["result"]["data"]["dsr"]["DS"][0]["ValueDicts"]["D9"])
-    entries = response.json()["results"][0]["result"]["data"]["dsr"]["DS"][0]["PH"][0]["DM0"]
-    urls.update(value for entry in entries for value in entry["C"] if str(value).startswith("http"))
+    with timed("Querying Power BI"):
+        urls = {
+            value
+            for row in client.query(post_data)
+            for value in row.values()
+            if isinstance(value, str) and value.startswith("http")
+        }
 
     base_url = "https://comunidad.comprasdominicana.gob.do"
     pattern = re.compile(r"documentFileId=(\d+)")
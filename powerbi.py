@@ -0,0 +1,207 @@
+"""
+Query Power BI reports that are published to the web.
+
+Responses look like:
+
+{
+    "jobIds": ["UUID"],
+    "results": [
+        {
+            "jobId": "UUID",
+            "result": {
+                "data": {
+                    "timestamp": "2023-10-10T18:22:39.397Z",
+                    "rootActivityId": "UUID",
+                    "descriptor": {...},
+                    "metrics": {...}, // start times, end times, row counts for operations
+                    "fromCache": false,
+                    "dsr": {
+                        "Version": 2,
+                        "MinorVersion": 1,
+                        "DS": [
+                            {
+                                "N": "DS0",
+                                "PH": [
+                                    {
+                                        "DM0": [
+                                            {
+                                                "S": [...],
+                                                "C": [...]
+                                            },
+                                            {
+                                                "C": [
+                                                    // a row of values
+                                                ],
+                                                "R": 123
+                                            },
+                                            ...
+                                        ]
+                                    }
+                                ],
+                                "IC": true,
+                                "HAD": true,
+                                "RT": [[...]], // restart tokens, if there are more rows
+                                "ValueDicts": {
+                                    "D0": [
+                                        "...",
+                                        ...
+                                    ],
+                                    ...
+                                }
+                            }
+                        ]
+                    }
+                }
+            }
+        }
+    ]
+}
+"""
+
+import copy
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+import requests
+
+QUERYDATA_URL = "https://wabi-us-east-a-primary-api.analysis.windows.net/public/reports/querydata?synchronous=true"
+
+
+class PowerBIError(Exception):
+    pass
+
+
+def window(data):
+    """Return the data reduction window of the query, which holds the restart tokens."""
+    command = data["queries"][0]["Query"]["Commands"][0]["SemanticQueryDataShapeCommand"]
+    return command["Binding"]["DataReduction"]["Primary"]["Window"]
+
+
+def decode(data):
+    """
+    Decode the rows of a query result's data, and return the rows and the restart tokens, if any.
+
+    The rows of the first data shape are compressed as follows:
+
+    -  The first row's "S" key sets the schema of the columns. If a column's schema has a "DN" key, its values are
+       indexes in the ``ValueDicts`` object's list with that name.
+    -  A row's "R" key is a bitmask of the columns whose values are repeated from the previous row.
+    -  A row's "Ø" key is a bitmask of the columns whose values are null.
+    -  A row's "C" key is the values of the other columns, in order.
+
+    Each row is returned as a dict, whose keys are the names of the selected columns, measures and aggregations.
+    """
+    ds = data["dsr"]["DS"][0]
+    if "odata.error" in ds:
+        raise PowerBIError(ds["odata.error"])
+
+    value_dicts = ds.get("ValueDicts", {})
+    names = {select["Value"]: select["Name"] for select in (data.get("descriptor") or {}).get("Select", [])}
+
+    rows = []
+    schema = []
+    previous = []
+    for entry in ds["PH"][0].get("DM0", []):
+        if "S" in entry:
+            schema = entry["S"]
+            previous = [None] * len(schema)
+
+        repeat = entry.get("R", 0)
+        null = entry.get("Ø", 0)
+        values = iter(entry.get("C", []))
+
+        row = []
+        for i, column in enumerate(schema):
+            if repeat >> i & 1:
+                value = previous[i]
+            elif null >> i & 1:
+                value = None
+            else:
+                value = next(values)
+                if "DN" in column and isinstance(value, int):
+                    value = value_dicts[column["DN"]][value]
+            row.append(value)
+
+        previous = row
+        rows.append({names.get(column["N"], column["N"]): value for column, value in zip(schema, row, strict=True)})
+
+    return rows, ds.get("RT")
+
+
+class Client:
+    """
+    Query a Power BI report that is published to the web.
+
+    If ``cache_dir`` is set, responses are cached in that directory. A cached response younger than ``max_age``
+    seconds is used without a request. Otherwise, the request is conditional on the cached response's validators.
+    """
+
+    def __init__(self, resource_key, cache_dir=None, max_age=86400, url=QUERYDATA_URL, session=None, timeout=10):
+        self.url = url
+        self.cache_dir = cache_dir
+        self.max_age = max_age
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self.headers = {"X-PowerBI-ResourceKey": resource_key}
+
+    def post(self, data):
+        """Return the JSON response to the request data, from the cache if possible."""
+        path = None
+        cached = None
+        headers = self.headers.copy()
+
+        if self.cache_dir:
+            key = hashlib.sha256(json.dumps([self.url, data], sort_keys=True).encode()).hexdigest()
+            path = Path(self.cache_dir) / f"{key}.json"
+            if path.exists():
+                with path.open() as f:
+                    cached = json.load(f)
+                if time.time() - path.stat().st_mtime < self.max_age:
+                    return cached["response"]
+                if etag := cached["headers"].get("ETag"):
+                    headers["If-None-Match"] = etag
+                if last_modified := cached["headers"].get("Last-Modified"):
+                    headers["If-Modified-Since"] = last_modified
+
+        response = self.session.post(self.url, json=data, headers=headers, timeout=self.timeout)
+
+        if response.status_code == 304 and cached:
+            os.utime(path)
+            return cached["response"]
+
+        response.raise_for_status()
+        body = response.json()
+
+        if path:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("w") as f:
+                validators = {k: response.headers[k] for k in ("ETag", "Last-Modified") if k in response.headers}
+                json.dump({"headers": validators, "response": body}, f)
+
+        return body
+
+    def query(self, data):
+        """Yield all the rows of the query, following the restart tokens to request each page."""
+        data = copy.deepcopy(data)
+        descriptor = None
+        seen = set()
+
+        while True:
+            result = self.post(data)["results"][0]["result"]
+            if "error" in result:
+                raise PowerBIError(result["error"])
+
+            # Later pages might omit the descriptor, which names the columns.
+            descriptor = result["data"].setdefault("descriptor", descriptor)
+            rows, restart_tokens = decode(result["data"])
+            yield from rows
+
+            # Guard against a server that returns the same restart tokens, which would loop forever.
+            key = json.dumps(restart_tokens)
+            if not restart_tokens or key in seen:
+                break
+            seen.add(key)
+            window(data)["RestartTokens"] = restart_tokens
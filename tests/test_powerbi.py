@@ -0,0 +1,139 @@
+import copy
+import json
+from pathlib import Path
+
+import powerbi
+
+basedir = Path(__file__).resolve().parent.parent
+fixtures = Path(__file__).resolve().parent / "fixtures"
+
+URL = "https://comunidad.comprasdominicana.gob.do/Public/Tendering/OpportunityDetail/Index?noticeUID="
+
+
+class Response:
+    def __init__(self, body, status_code=200, headers=None):
+        self.body = body
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def json(self):
+        return self.body
+
+    def raise_for_status(self):
+        pass
+
+
+class Session:
+    """Reply to each POST with the next response, and record the requests."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def post(self, url, json, headers, timeout):
+        self.requests.append({"url": url, "json": copy.deepcopy(json), "headers": headers, "timeout": timeout})
+        return self.responses.pop(0)
+
+
+def post_data():
+    with (basedir / "assets" / "do_post.json").open() as f:
+        return json.load(f)
+
+
+def fixture(number):
+    with (fixtures / f"querydata-{number}.json").open() as f:
+        return json.load(f)
+
+
+def test_query():
+    data = post_data()
+    session = Session(Response(fixture(1)), Response(fixture(2)))
+
+    rows = list(powerbi.Client("key", session=session).query(data))
+
+    assert len(rows) == 5
+    assert rows[0] == {
+        "ProcesosPortal.UNIDAD_COMPRA": "Ministerio de Obras Públicas y Comunicaciones",
+        "ProcesosPortal.CODIGO_PROCESO": "MOPC-CCC-CP-2023-0012",
+        "Sum(ProcesosPortal.MONTO_ESTIMADO)": 1500000,
+        "ProcesosPortal.ESTADO_PROCESO": "Proceso con etapa cerrada",
+        "ProcesosPortal.MODALIDAD": "Compras por debajo del umbral",
+        "ProcesosPortal.DIRIGIDO_MIPYMES": "No",
+        "ProcesosPortal.DIRIGIDO_MIPYMES_MUJERES": "Si",
+        "Tabla de medidas.Enlace": "Ver proceso",
+        "ProcesosPortal.CARATULA": "Adquisición de mobiliario de oficina",
+        "ProcesosPortal.Fecha de publicación": 1696896000000,
+        "Min(ProcesosPortal.EstadoColor)": 2,
+        "Min(ProcesosPortal.URL)": f"{URL}DO1.NTC.1305239",
+    }
+    # "R" repeats UNIDAD_COMPRA, ESTADO_PROCESO, MODALIDAD, DIRIGIDO_MIPYMES and Enlace.
+    assert rows[1] == {
+        "ProcesosPortal.UNIDAD_COMPRA": "Ministerio de Obras Públicas y Comunicaciones",
+        "ProcesosPortal.CODIGO_PROCESO": "MOPC-CCC-LPN-2023-0007",
+        "Sum(ProcesosPortal.MONTO_ESTIMADO)": 8200000.5,
+        "ProcesosPortal.ESTADO_PROCESO": "Proceso con etapa cerrada",
+        "ProcesosPortal.MODALIDAD": "Compras por debajo del umbral",
+        "ProcesosPortal.DIRIGIDO_MIPYMES": "No",
+        "ProcesosPortal.DIRIGIDO_MIPYMES_MUJERES": "No",
+        "Tabla de medidas.Enlace": "Ver proceso",
+        "ProcesosPortal.CARATULA": "Compra de papel reciclado",
+        "ProcesosPortal.Fecha de publicación": 1696809600000,
+        "Min(ProcesosPortal.EstadoColor)": 2,
+        "Min(ProcesosPortal.URL)": f"{URL}DO1.NTC.1302214",
+    }
+    # "R" repeats the DIRIGIDO_* columns, and "Ø" nulls MONTO_ESTIMADO and CARATULA.
+    assert rows[2] == {
+        "ProcesosPortal.UNIDAD_COMPRA": "Instituto Nacional de Bienestar Estudiantil",
+        "ProcesosPortal.CODIGO_PROCESO": "INABIE-DAF-CM-2023-0101",
+        "Sum(ProcesosPortal.MONTO_ESTIMADO)": None,
+        "ProcesosPortal.ESTADO_PROCESO": "Proceso publicado",
+        "ProcesosPortal.MODALIDAD": "Licitación Pública Nacional",
+        "ProcesosPortal.DIRIGIDO_MIPYMES": "No",
+        "ProcesosPortal.DIRIGIDO_MIPYMES_MUJERES": "No",
+        "Tabla de medidas.Enlace": "Ver proceso",
+        "ProcesosPortal.CARATULA": None,
+        "ProcesosPortal.Fecha de publicación": 1696723200000,
+        "Min(ProcesosPortal.EstadoColor)": 1,
+        "Min(ProcesosPortal.URL)": f"{URL}DO1.NTC.1299870",
+    }
+    # The second page has its own ValueDicts.
+    assert rows[3]["ProcesosPortal.UNIDAD_COMPRA"] == "Instituto Tecnológico de Las Américas"
+    assert rows[3]["Min(ProcesosPortal.URL)"] == f"{URL}DO1.NTC.1297000"
+    # A value in a column with a "DN" can be a literal instead of an index.
+    assert rows[4] == rows[3] | {
+        "ProcesosPortal.CODIGO_PROCESO": "ITLA-CCC-CP-2023-0005",
+        "Min(ProcesosPortal.URL)": f"{URL}DO1.NTC.1297001",
+    }
+
+    assert len(session.requests) == 2
+    assert all(request["headers"] == {"X-PowerBI-ResourceKey": "key"} for request in session.requests)
+    assert "RestartTokens" not in powerbi.window(session.requests[0]["json"])
+    assert powerbi.window(session.requests[1]["json"])["RestartTokens"] == [
+        ["'INABIE-DAF-CM-2023-0101'", "1696723200000L"]
+    ]
+    # The caller's request data is unchanged.
+    assert data == post_data()
+
+
+def test_query_cache(tmp_path):
+    data = post_data()
+    session = Session(
+        Response(fixture(1), headers={"ETag": '"1"'}),
+        Response(fixture(2), headers={"ETag": '"2"'}),
+    )
+    client = powerbi.Client("key", cache_dir=tmp_path, session=session)
+
+    expected = list(client.query(data))
+
+    # Fresh cached responses are used without requests.
+    assert list(client.query(data)) == expected
+    assert len(session.requests) == 2
+
+    # Stale cached responses are revalidated.
+    client.max_age = 0
+    session.responses = [Response(None, status_code=304), Response(None, status_code=304)]
+
+    assert list(client.query(data)) == expected
+    assert len(session.requests) == 4
+    assert session.requests[2]["headers"]["If-None-Match"] == '"1"'
+    assert session.requests[3]["headers"]["If-None-Match"] == '"2"'